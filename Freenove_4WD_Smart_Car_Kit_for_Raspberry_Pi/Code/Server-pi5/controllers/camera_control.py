@@ -1,4 +1,12 @@
 # controllers/camera_control.py
+"""
+カメラ映像をMacへ送信し、ARマーカーの検出結果を受け取って音声を再生するモジュール。
+
+ARマーカー検出をPi上で行う combined_control.py と併存している。
+show_window=False で起動するとOpenCVのウィンドウ関連の関数（imshow / waitKey /
+destroyAllWindows）を一切呼ばないため、画面のないサーバーでも動作する。
+この場合は opencv-python-headless を使うとGUIライブラリ自体を読み込まずに済む。
+"""
 import cv2
 from picamera2 import Picamera2
 import time
@@ -9,10 +17,51 @@ import queue
 import zmq
 import numpy as np
 import json
+import heapq
+import itertools
 
 # ログの設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')  # INFOレベルに設定
 
+class CommandScheduler:
+    """
+    一定時間後にキューへコマンドを送る処理を、1つのスレッドでまとめて行うクラス
+    （検出のたびにTimerスレッドを生成しないようにする）
+    """
+    def __init__(self, command_queue):
+        self.command_queue = command_queue
+        self.pending = []  # (期限, 登録順, コマンド) のヒープ（先頭が最も早い期限）
+        self.sequence = itertools.count()  # 同じ期限のコマンドを登録順に送るための番号
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='CommandSchedulerThread', daemon=True)
+        self.thread.start()
+
+    def schedule(self, delay, command):
+        with self.condition:
+            heapq.heappush(self.pending, (time.monotonic() + delay, next(self.sequence), command))
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+    def _run(self):
+        with self.condition:
+            while self.running:
+                if not self.pending:
+                    self.condition.wait()
+                    continue
+                deadline, _, command = self.pending[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(timeout=remaining)
+                    continue
+                heapq.heappop(self.pending)
+                self.command_queue.put(command)
+
 def send_frame(socket, frame):
     """
     フレームをエンコードして送信する関数
@@ -44,11 +93,11 @@ def receive_detection(socket):
         logging.error(f"Error receiving detection: {e}")
         return None
 
-def camera_control(audio_queue):
+def camera_control(audio_queue, show_window=True):
     """
     カメラから映像を取得し、ARマーカー検出をMac側で行います。
     検出結果に応じて音声を再生します。
-    映像をリアルタイムで画面に表示します。
+    show_windowがTrueの場合は映像をリアルタイムで画面に表示します。
     """
     # ZeroMQコンテキストの作成
     context = zmq.Context()
@@ -62,6 +111,9 @@ def camera_control(audio_queue):
     detection_receiver.connect("tcp://192.168.47.103:5556")  # MacのIPアドレスに置き換えてください
     detection_receiver.setsockopt_string(zmq.SUBSCRIBE, "")  # 全メッセージを購読
 
+    # 音声停止指示の遅延送信用スケジューラ
+    scheduler = CommandScheduler(audio_queue)
+
     try:
         # Picamera2の初期化
         picam2 = Picamera2()
@@ -119,21 +171,22 @@ def camera_control(audio_queue):
                             # 音声再生の指示をキューに送信
                             audio_queue.put("PLAY_AR_SOUND")
                             # 一定時間後に音声停止の指示を送信（例：2秒後）
-                            threading.Timer(2.0, lambda: audio_queue.put("STOP_AR_SOUND")).start()
+                            scheduler.schedule(2.0, "STOP_AR_SOUND")
                 except json.JSONDecodeError as e:
                     logging.error(f"Error decoding detection data: {e}")
                 except Exception as e:
                     logging.error(f"Error processing detection data: {e}")
 
-            # 映像をリアルタイムで表示
-            try:
-                cv2.imshow("Camera Feed", frame)
-                # 'q'キーで終了
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    logging.info("Stopping camera feed.")
-                    break
-            except cv2.error as e:
-                logging.error(f"Error displaying frame: {e}")
+            # 映像をリアルタイムで表示（ヘッドレス時は表示しない）
+            if show_window:
+                try:
+                    cv2.imshow("Camera Feed", frame)
+                    # 'q'キーで終了
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        logging.info("Stopping camera feed.")
+                        break
+                except cv2.error as e:
+                    logging.error(f"Error displaying frame: {e}")
 
     except KeyboardInterrupt:
         logging.info("\nExiting camera control thread gracefully.")
@@ -147,8 +200,10 @@ def camera_control(audio_queue):
                 logging.info("Camera stopped successfully.")
             except Exception as e:
                 logging.error(f"Error stopping camera: {e}")
-        cv2.destroyAllWindows()
+        if show_window:
+            cv2.destroyAllWindows()
         logging.info("Camera resources have been released.")
+        scheduler.stop()
         # ソケットのクリーンアップ
         frame_sender.close()
         detection_receiver.close()
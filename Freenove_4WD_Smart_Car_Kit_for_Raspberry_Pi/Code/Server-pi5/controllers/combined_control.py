@@ -1,37 +1,133 @@
 # controllers/combined_control.py
 import cv2
 from cv2 import aruco
-from picamera2 import Picamera2
+import numpy as np
+from picamera2 import Picamera2, MappedArray
 import time
 import logging
 import threading
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from gpiozero import Buzzer as GPIOBuzzer
 
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
+# 検出ループを固定するCPUコア（Pi5のコア3。他のスレッドは残りのコアを使う）
+DETECTION_CPU = 3
+
+def pin_current_thread(cpus):
+    """
+    呼び出したスレッドを指定したCPUコアに固定します（Linuxのみ）。
+    cpusはコアを固定する前に取得した使用可能なコアの範囲で指定し、空の場合は何もしません。
+    """
+    if not hasattr(os, "sched_setaffinity") or not cpus:
+        return
+    try:
+        # Linuxではpid 0は呼び出したスレッドのみを対象とする
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        logging.warning(f"Failed to set CPU affinity: {e}")
+
+def release_pending_requests(frame_queue):
+    """
+    キューに残っているキャプチャリクエストをすべてカメラに返却します。
+    """
+    while True:
+        try:
+            frame_queue.get_nowait().release()
+        except queue.Empty:
+            break
+
+def capture_frames(picam2, frame_queue, stop_event):
+    """
+    カメラからキャプチャリクエストを取得し続け、最新の1つだけをキューに保持します。
+    フレームはカメラのバッファのままコピーせずに渡し、
+    検出が追いつかない場合は古いリクエストをカメラに返却します。
+    """
+    while not stop_event.is_set():
+        try:
+            request = picam2.capture_request()
+        except Exception as e:
+            logging.error(f"Error capturing frame: {e}")
+            break
+        # 古いリクエストを返却して最新のリクエストに置き換える
+        release_pending_requests(frame_queue)
+        frame_queue.put(request)
+
+def save_image(filepath, image):
+    """
+    画像をJPEG形式でファイルに保存します（保存用スレッドで実行）。
+    """
+    try:
+        cv2.imwrite(filepath, image, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+        logging.info(f"AR marker detected. Image saved as {filepath}")
+    except cv2.error as e:
+        logging.error(f"Error saving image: {e}")
+
+def marker_roi(corners, margin, frame_size):
+    """
+    検出したマーカー全体を囲む矩形をmarginの割合だけ広げ、
+    フレーム内に収まるように (x, y, w, h) で返します。
+    """
+    points = np.concatenate([c.reshape(-1, 2) for c in corners]).astype(np.float32)
+    x, y, w, h = cv2.boundingRect(points)
+    dx = int(w * margin)
+    dy = int(h * margin)
+    x0 = max(x - dx, 0)
+    y0 = max(y - dy, 0)
+    x1 = min(x + w + dx, frame_size[0])
+    y1 = min(y + h + dy, frame_size[1])
+    return x0, y0, x1 - x0, y1 - y0
+
 def combined_control():
     """
     カメラアクセス、ARマーカー検出、およびブザー制御を統合的に管理します。
     """
     picam2 = None
     buzzer_gpio = None
+    capture_thread = None
+    stop_event = threading.Event()
+    frame_queue = queue.Queue(maxsize=1)  # 最新のキャプチャリクエストのみを保持
+    # CPUコアの割り当て（検出ループ以外は検出用コアを避ける）
+    available_cpus = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else set()
+    # 各スレッドの現在の割り当てではなく、固定前に取得した使用可能なコアを基準にする
+    detection_cpus = available_cpus & {DETECTION_CPU}
+    other_cpus = available_cpus - {DETECTION_CPU}
+    # 画像保存用（保存スレッドは検出ループから生成されるので、コアの固定を解除する）
+    save_executor = ThreadPoolExecutor(max_workers=1, initializer=pin_current_thread, initargs=(other_cpus,))
     try:
         # Picamera2の初期化
         picam2 = Picamera2()
         resolution = (640, 480)
         preview_config = picam2.create_preview_configuration(
-            main={"format": 'RGB888', "size": resolution}
+            main={"format": 'YUV420', "size": resolution}  # 輝度(Y)面をそのまま検出に使う
         )
         picam2.configure(preview_config)
         picam2.start()
         logging.info("Camera started successfully.")
 
-        # ARUCOの初期化
-        aruco_dict = aruco.Dictionary_get(aruco.DICT_4X4_50)
-        parameters = aruco.DetectorParameters_create()
-        parameters.cornerRefinementMethod = aruco.CORNER_REFINE_SUBPIX
+        # ARUCOの初期化（検出器は一度だけ生成して使い回す）
+        aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
+        parameters = aruco.DetectorParameters()
+        # 姿勢推定は行わずIDのみを使うため、サブピクセル補正は不要
+        parameters.cornerRefinementMethod = aruco.CORNER_REFINE_NONE
+        # 適応的二値化のウィンドウサイズを1種類（7）に絞る（明るい屋内での使用を想定）
+        parameters.adaptiveThreshWinSizeMin = 7
+        parameters.adaptiveThreshWinSizeMax = 7
+        parameters.adaptiveThreshWinSizeStep = 2
+        detector = aruco.ArucoDetector(aruco_dict, parameters)
+
+        # 検出用の縮小率（1/2に縮小して処理する画素数を約1/4にする）
+        detect_scale = 2
+        detect_size = (resolution[0] // detect_scale, resolution[1] // detect_scale)
+
+        # 前フレームのマーカー周辺（ROI）のみを検出する設定
+        roi_margin = 0.3  # 矩形を30%広げる
+        full_detect_interval = 10  # 10フレームごとに全体を検出し直す
+        roi = None
+        frames_since_full_detect = 0
 
         # imgフォルダのパスを設定
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -40,52 +136,115 @@ def combined_control():
             os.makedirs(img_dir)
             logging.info(f"Image directory created at {img_dir}")
 
+        # 保存ファイルパスの接頭辞（ファイル名は「接頭辞 + UNIX時刻_連番.jpg」で作る）
+        save_prefix = os.path.join(img_dir, "aruco_detected_")
+        save_count = 0
+
+        # 画像保存の最小間隔（秒）
+        save_interval = 1.0
+        last_save_time = 0.0
+
         # GPIOブザーの初期化
         buzzer_gpio = GPIOBuzzer(27)  # ブザーが接続されているGPIOピンを指定
         logging.info("Buzzer GPIO initialized successfully.")
 
-        while True:
-            # カメラからのフレームキャプチャ
-            frame = picam2.capture_array()
+        # キャプチャスレッドの開始
+        capture_thread = threading.Thread(target=capture_frames, args=(picam2, frame_queue, stop_event), name='CaptureThread', daemon=True)
+        capture_thread.start()
 
-            # フレームの検証
-            if frame is None or frame.size == 0:
-                logging.warning("Empty frame captured. Skipping frame processing.")
+        # OpenCVの並列処理用スレッドは初回使用時に生成され、呼び出し元のCPU割り当てを引き継ぐ。
+        # コアを固定する前にダミーフレームで一度処理し、全コアを使えるスレッドを生成させておく
+        dummy = np.zeros((resolution[1], resolution[0]), dtype=np.uint8)
+        detector.detectMarkers(cv2.resize(dummy, detect_size, interpolation=cv2.INTER_AREA))
+
+        # キャプチャスレッドの開始後に、検出ループのスレッドを専用コアに固定
+        pin_current_thread(detection_cpus)
+
+        while True:
+            # キャプチャスレッドから最新のキャプチャリクエストを取得
+            try:
+                request = frame_queue.get(timeout=1.0)
+            except queue.Empty:
+                # キャプチャスレッドがエラーで終了していればループを抜けて後処理を行う
+                if not capture_thread.is_alive():
+                    logging.error("Capture thread has stopped. Exiting combined control.")
+                    break
+                logging.warning("No frame received from capture thread.")
                 continue
 
-            # グレースケール変換
-            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-
-            # ARUCOマーカーの検出
-            corners, ids, rejectedImgPoints = aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
-
-            # 検出結果の描画
-            if ids is not None:
-                frame_markers = aruco.drawDetectedMarkers(frame.copy(), corners, ids)
-                timestamp = time.strftime("%Y%m%d-%H%M%S")
-                filename = f"aruco_detected_{timestamp}.png"
-                filepath = os.path.join(img_dir, filename)
-                cv2.imwrite(filepath, frame_markers)
-                logging.info(f"AR marker detected. Image saved as {filepath}")
-                # ブザーの鳴動 (GPIOを使用)
-                buzzer_gpio.on()
-            else:
-                frame_markers = frame.copy()
-                buzzer_gpio.off()  # ブザーをオフにする
-
-            # フレームの表示
-            cv2.imshow("AR Marker Detection", frame_markers)
-
-            # 'q'キーでループを抜ける
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                logging.info("Stopping camera feed.")
-                break
+            # カメラのバッファをコピーせずに参照し、処理後にリクエストを返却する
+            try:
+                with MappedArray(request, "main") as mapped:
+                    frame = mapped.array
+
+                    # フレームの検証
+                    if frame is None or frame.size == 0:
+                        logging.warning("Empty frame captured. Skipping frame processing.")
+                        continue
+
+                    # YUV420バッファの先頭がY面(輝度)なので、変換せずにグレースケールとして切り出す
+                    gray = frame[:resolution[1], :resolution[0]]
+
+                    ids = None
+                    # 前フレームでマーカーを検出していれば、その周辺のみを検出
+                    if roi is not None and frames_since_full_detect < full_detect_interval:
+                        x, y, w, h = roi
+                        corners, ids, rejectedImgPoints = detector.detectMarkers(gray[y:y + h, x:x + w])
+                        # ROI内の座標をフレーム全体の座標に戻す
+                        offset = np.array([x, y], dtype=np.float32)
+                        corners = tuple(c + offset for c in corners)
+                        frames_since_full_detect += 1
+
+                    # ROIで見失った場合や一定フレームごとに、縮小したフレーム全体で検出
+                    if ids is None:
+                        small = cv2.resize(gray, detect_size, interpolation=cv2.INTER_AREA)
+                        corners, ids, rejectedImgPoints = detector.detectMarkers(small)
+                        # 検出したコーナー座標を元の解像度に戻す
+                        corners = tuple(c * float(detect_scale) for c in corners)
+                        frames_since_full_detect = 0
+
+                    # 次のフレームで使うROIを更新
+                    roi = marker_roi(corners, roi_margin, resolution) if ids is not None else None
+
+                    # 検出結果の描画
+                    if ids is not None:
+                        # BGRへの変換は検出時のみ行う
+                        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+                        frame_markers = aruco.drawDetectedMarkers(frame_bgr, corners, ids)
+                        # 保存は1秒に1回までとし、別スレッドで行って検出ループを止めない
+                        now = time.monotonic()
+                        if now - last_save_time >= save_interval:
+                            last_save_time = now
+                            save_count += 1
+                            filepath = save_prefix + f"{int(time.time())}_{save_count}.jpg"
+                            save_executor.submit(save_image, filepath, frame_markers)
+                        # ブザーの鳴動 (GPIOを使用)
+                        buzzer_gpio.on()
+                    else:
+                        frame_markers = gray  # コピーせずにそのまま表示する
+                        buzzer_gpio.off()  # ブザーをオフにする
+
+                    # フレームの表示
+                    cv2.imshow("AR Marker Detection", frame_markers)
+
+                    # 'q'キーでループを抜ける
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        logging.info("Stopping camera feed.")
+                        break
+            finally:
+                request.release()
 
     except KeyboardInterrupt:
         logging.info("\nExiting combined control gracefully.")
     except Exception as e:
         logging.error(f"An unexpected error occurred in combined_control: {e}")
     finally:
+        # キャプチャスレッドの停止と保存待ちの画像の書き込み
+        stop_event.set()
+        if capture_thread is not None:
+            capture_thread.join(timeout=2.0)
+        release_pending_requests(frame_queue)
+        save_executor.shutdown(wait=True)
         # カメラの停止とウィンドウの閉鎖
         if picam2 is not None:
             try:
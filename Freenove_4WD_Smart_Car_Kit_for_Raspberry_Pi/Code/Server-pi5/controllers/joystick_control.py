@@ -7,6 +7,7 @@ from servo import Servo
 import logging
 import os
 import queue
+from controllers.pwm_mix import build_axis_lut, mix
 
 # ログの設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')  # ログレベルをINFOに設定
@@ -95,9 +96,16 @@ def joystick_control(audio_queue):
         # 最大PWM値
         MAX_PWM = 4095
 
+        # デッドゾーン適用済みの軸入力→PWM値テーブル
+        MOVE_LUT = build_axis_lut(DEAD_ZONE_MOVEMENT, MAX_PWM)
+        TURN_LUT = build_axis_lut(DEAD_ZONE_TURN, MAX_PWM)
+
         # 旋回速度スケーリングファクター
         TURN_SPEED_FACTOR = 0.3  # 旋回速度を30%に設定（以前より低速に変更）
 
+        # 制御ループに入る前にmixを一度呼び、NumbaのJITコンパイルを済ませておく
+        mix(0.0, 0.0, 0.0, MOVE_LUT, TURN_LUT, TURN_SPEED_FACTOR, MAX_PWM)
+
         # サーボ角度の定義（0°から180°）
         SERVO_NECK_UP = 160    # サーボを上に移動
         SERVO_NECK_DOWN = 120  # サーボを下に移動
@@ -107,88 +115,74 @@ def joystick_control(audio_queue):
         servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_NEUTRAL)
         logging.info("Servo0 set to neutral position.")
 
-        # クロックの初期化（FPS制御用）
-        clock = pygame.time.Clock()
+        def handle_button(event):
+            """
+            ボタンの押下・解放イベントに応じてサーボとブザーを制御します。
+            """
+            button = event.button
+            if event.type == pygame.JOYBUTTONDOWN:
+                logging.info(f"Button {button} pressed.")
+
+                # サーボ制御
+                if button == 6:  # L2 Trigger
+                    servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_DOWN)
+                    logging.info(f"Servo0 moved down to {SERVO_NECK_DOWN} degrees.")
+                elif button == 7:  # R2 Trigger
+                    servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_UP)
+                    logging.info(f"Servo0 moved up to {SERVO_NECK_UP} degrees.")
+
+                # 特定のボタン押下でブザーを再生
+                if button == 0:
+                    buzzer.play()
+            else:
+                # サーボを中立位置に戻す
+                if button in [6, 7]:
+                    servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_NEUTRAL)
+                    logging.info("Servo0 reset to neutral position.")
+
+                # ブザーの停止
+                if button == 0:
+                    buzzer.stop()
+
+        # イベント待機のタイムアウトとモーター指令の送信間隔（約60Hz）
+        EVENT_WAIT_TIMEOUT_MS = 16
+        SEND_INTERVAL = EVENT_WAIT_TIMEOUT_MS / 1000
+        last_send = 0.0
 
         while True:
             try:
-                # イベントの処理
-                for event in pygame.event.get():
+                # イベントを待機（最大16ms、イベントがなければNOEVENTが返る）し、
+                # 溜まっているイベントもまとめて取り出してから処理する
+                events = [pygame.event.wait(timeout=EVENT_WAIT_TIMEOUT_MS)]
+                events.extend(pygame.event.get())
+                for event in events:
                     if event.type == pygame.QUIT:
                         return  # ループを抜ける
+                    elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+                        handle_button(event)
 
-                    elif event.type == pygame.JOYBUTTONDOWN:
-                        button = event.button
-                        logging.info(f"Button {button} pressed.")
-
-                        # サーボ制御
-                        if button == 6:  # L2 Trigger
-                            servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_DOWN)
-                            logging.info(f"Servo0 moved down to {SERVO_NECK_DOWN} degrees.")
-                        elif button == 7:  # R2 Trigger
-                            servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_UP)
-                            logging.info(f"Servo0 moved up to {SERVO_NECK_UP} degrees.")
-
-                        # 特定のボタン押下でブザーを再生
-                        if button == 0:
-                            buzzer.play()
-
-                    elif event.type == pygame.JOYBUTTONUP:
-                        button = event.button
-                        # サーボを中立位置に戻す
-                        if button in [6, 7]:
-                            servo.setServoPwm(SERVO_NECK_CHANNEL, SERVO_NECK_NEUTRAL)
-                            logging.info("Servo0 reset to neutral position.")
-
-                        # ブザーの停止
-                        if button == 0:
-                            buzzer.stop()
+                # モーター指令は16msごとに1回だけ送信する
+                now = time.monotonic()
+                if now - last_send < SEND_INTERVAL:
+                    continue
+                last_send = now
 
                 # ジョイスティックの軸入力を取得
                 left_vertical = joystick.get_axis(1)      # 左スティックY軸（前後）
                 left_horizontal = joystick.get_axis(0)    # 左スティックX軸（左右）
                 right_horizontal = joystick.get_axis(3)   # 右スティックX軸（旋回）
 
-                # 生の軸値をログに表示（デバッグ用）
-                logging.debug(f"Raw axes: {[joystick.get_axis(i) for i in range(joystick.get_numaxes())]}")
-
-                # デッドゾーンの適用
-                if abs(left_vertical) < DEAD_ZONE_MOVEMENT:
-                    left_vertical = 0
-                if abs(left_horizontal) < DEAD_ZONE_MOVEMENT:
-                    left_horizontal = 0
-                if abs(right_horizontal) < DEAD_ZONE_TURN:
-                    right_horizontal = 0
-
-                # 移動方向の計算
-                y = -left_vertical      # 前後の動き（反転）
-                x = left_horizontal     # 左右の動き
-                turn = right_horizontal * (TURN_SPEED_FACTOR if (x == 0 and y == 0) else 0.7)  # 左スティックと連動時は旋回速度を調整
-
-                # PWM値への変換（-4095から4095）
-                duty_y = int(y * MAX_PWM)
-                duty_x = int(x * MAX_PWM)
-                duty_turn = int(turn * MAX_PWM)
-
-                # メカナムホイール用のPWM値の計算（全方向移動をサポート）
-                # 左右移動と旋回が連動するように計算
-                duty_front_left = duty_y + duty_x + duty_turn
-                duty_front_right = duty_y - duty_x - duty_turn
-                duty_back_left = duty_y - duty_x + duty_turn
-                duty_back_right = duty_y + duty_x - duty_turn
-
-                # PWM値を制限（-4095～4095）
-                duty_front_left = max(min(duty_front_left, MAX_PWM), -MAX_PWM)
-                duty_front_right = max(min(duty_front_right, MAX_PWM), -MAX_PWM)
-                duty_back_left = max(min(duty_back_left, MAX_PWM), -MAX_PWM)
-                duty_back_right = max(min(duty_back_right, MAX_PWM), -MAX_PWM)
+                # 生の軸値をログに表示（デバッグ用、DEBUGレベル時のみリストを生成）
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(f"Raw axes: {[joystick.get_axis(i) for i in range(joystick.get_numaxes())]}")
+
+                # メカナムホイール用のPWM値の計算（全方向移動をサポート、-4095～4095に制限）
+                duty_front_left, duty_back_left, duty_front_right, duty_back_right, is_turning = mix(
+                    left_vertical, left_horizontal, right_horizontal, MOVE_LUT, TURN_LUT, TURN_SPEED_FACTOR, MAX_PWM)
 
                 # PWM値をログに表示（デバッグ用）
                 logging.debug(f"PWM values - FL: {duty_front_left}, FR: {duty_front_right}, BL: {duty_back_left}, BR: {duty_back_right}")
 
-                # 旋回中かどうかを判定
-                is_turning = (turn != 0)
-
                 # モーターにPWM値を送信
                 motor.setMotorModel(duty_front_left, duty_back_left, duty_front_right, duty_back_right, turning=is_turning)
 
@@ -212,9 +206,6 @@ def joystick_control(audio_queue):
                 except queue.Empty:
                     pass
 
-                # FPSを60に制限
-                clock.tick(60)
-
             except IOError as e:
                 logging.error(f"I/O error occurred: {e}. Attempting to continue.")
                 if motor:
@@ -0,0 +1,55 @@
+# controllers/pwm_mix.py
+# ジョイスティック入力からメカナムホイールのPWM値を計算する数値処理
+# （Numbaを使う数値処理をジョイスティック制御のループから分離するため、別モジュールにしている）
+import logging
+import numpy as np
+
+# インポート時にルートロガーを設定してしまわないよう、モジュール専用のロガーを使う
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+except ImportError:
+    logger.warning("numba is not installed. PWM mixing runs as plain Python.")
+
+    def njit(*args, **kwargs):
+        """Numbaがない場合は関数をそのまま返します。"""
+        def decorator(func):
+            return func
+        return decorator
+
+# 軸入力(-1.0～1.0)を量子化するルックアップテーブルのサイズ
+# （奇数にして中央のエントリが0になるようにし、前進と後退の速度を対称に保つ）
+AXIS_LUT_SIZE = 257
+AXIS_LUT_SCALE = (AXIS_LUT_SIZE - 1) / 2  # round((axis + 1) * AXIS_LUT_SCALE) でインデックスに変換
+
+def build_axis_lut(dead_zone, max_pwm):
+    """
+    量子化した軸入力からPWM値を引くテーブルを作成します。
+    デッドゾーン内の入力は0になります。
+    """
+    axis = np.linspace(-1.0, 1.0, AXIS_LUT_SIZE)
+    return np.where(np.abs(axis) < dead_zone, 0, (axis * max_pwm).astype(np.int32)).astype(np.int32)
+
+@njit(cache=True, fastmath=True)
+def mix(left_vertical, left_horizontal, right_horizontal, move_lut, turn_lut, turn_speed_factor, max_pwm):
+    """
+    軸入力からメカナムホイール用のPWM値（-max_pwm～max_pwm）を計算します。
+    戻り値は setMotorModel の引数順 (FL, BL, FR, BR) と旋回中かどうかです。
+    """
+    # テーブル参照でデッドゾーンの適用とPWM値への変換を行う
+    duty_y = -move_lut[int(round((left_vertical + 1.0) * AXIS_LUT_SCALE))]  # 前後の動き（反転）
+    duty_x = move_lut[int(round((left_horizontal + 1.0) * AXIS_LUT_SCALE))]  # 左右の動き
+    duty_turn = turn_lut[int(round((right_horizontal + 1.0) * AXIS_LUT_SCALE))]  # 旋回
+    # 左スティックと連動時は旋回速度を調整
+    if duty_x == 0 and duty_y == 0:
+        duty_turn = int(duty_turn * turn_speed_factor)
+    else:
+        duty_turn = int(duty_turn * 0.7)
+
+    # 左右移動と旋回が連動するように計算し、PWM値を制限
+    duty_front_left = min(max(duty_y + duty_x + duty_turn, -max_pwm), max_pwm)
+    duty_back_left = min(max(duty_y - duty_x + duty_turn, -max_pwm), max_pwm)
+    duty_front_right = min(max(duty_y - duty_x - duty_turn, -max_pwm), max_pwm)
+    duty_back_right = min(max(duty_y + duty_x - duty_turn, -max_pwm), max_pwm)
+    return duty_front_left, duty_back_left, duty_front_right, duty_back_right, duty_turn != 0
@@ -20,12 +20,16 @@ def main():
     gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
 
     # ARマーカー検知
-    aruco_dict = aruco.Dictionary_get(aruco.DICT_4X4_50) # 4x4bitのARマーカーを検知するモデル指定
-    parameters =  aruco.DetectorParameters_create()
-    corners, ids, rejectedImgPoints = aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
+    aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50) # 4x4bitのARマーカーを検知するモデル指定
+    parameters = aruco.DetectorParameters()
+    parameters.adaptiveThreshWinSizeMin = 5
+    parameters.adaptiveThreshWinSizeMax = 15
+    parameters.adaptiveThreshWinSizeStep = 5
+    detector = aruco.ArucoDetector(aruco_dict, parameters)
+    corners, ids, rejectedImgPoints = detector.detectMarkers(gray)
 
     # 検知箇所を画像にマーキング
-    frame_markers = aruco.drawDetectedMarkers(frame.copy(), corners, ids)
+    frame_markers = aruco.drawDetectedMarkers(frame, corners, ids) # コピーせずに直接描画する
     cv2.imshow("result", cv2.cvtColor(frame_markers, cv2.COLOR_BGR2RGB))
 
     # キー入力があるまで待機. その後終了.
@@ -1,6 +1,7 @@
 # run.py
 import threading
 import sys
+import getopt
 import logging
 import time
 from controllers.joystick_control import joystick_control
@@ -10,7 +11,21 @@ import queue
 # ログの設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')  # ログレベルをINFOに設定
 
+def parse_opt():
+    """
+    コマンドライン引数を解析します。
+    -n: カメラ映像のウィンドウを表示しない（ヘッドレスで実行）
+    """
+    show_window = True
+    opts, args = getopt.getopt(sys.argv[1:], "n")
+    for o, a in opts:
+        if o == '-n':
+            show_window = False
+    return show_window
+
 def main():
+    show_window = parse_opt()
+
     # スレッド間通信用のキューを作成
     audio_queue = queue.Queue()
 
@@ -18,7 +33,7 @@ def main():
     joystick_thread = threading.Thread(target=joystick_control, args=(audio_queue,), name='JoystickControlThread')
 
     # カメラ制御スレッドの作成
-    camera_thread = threading.Thread(target=camera_control, args=(audio_queue,), name='CameraControlThread')
+    camera_thread = threading.Thread(target=camera_control, args=(audio_queue, show_window), name='CameraControlThread')
 
     # スレッドの開始
     joystick_thread.start()
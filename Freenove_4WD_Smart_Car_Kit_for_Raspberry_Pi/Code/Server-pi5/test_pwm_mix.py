@@ -0,0 +1,61 @@
+import sys
+import numpy as np
+from controllers.pwm_mix import AXIS_LUT_SCALE, build_axis_lut, mix
+
+# デッドゾーン・旋回速度・最大PWM値（joystick_control.pyと同じ値）
+DEAD_ZONE = 0.2
+TURN_SPEED_FACTOR = 0.3
+MAX_PWM = 4095
+
+def reference_mix(lv, lh, rh):
+    """
+    テーブルを使わない従来の計算式でPWM値を計算します。
+    """
+    y = 0.0 if abs(lv) < DEAD_ZONE else -lv
+    x = 0.0 if abs(lh) < DEAD_ZONE else lh
+    turn = 0.0 if abs(rh) < DEAD_ZONE else rh
+    turn *= TURN_SPEED_FACTOR if (x == 0 and y == 0) else 0.7
+    duty_y, duty_x, duty_turn = int(y * MAX_PWM), int(x * MAX_PWM), int(turn * MAX_PWM)
+    duties = [
+        max(min(duty_y + duty_x + duty_turn, MAX_PWM), -MAX_PWM),  # FL
+        max(min(duty_y - duty_x + duty_turn, MAX_PWM), -MAX_PWM),  # BL
+        max(min(duty_y - duty_x - duty_turn, MAX_PWM), -MAX_PWM),  # FR
+        max(min(duty_y + duty_x - duty_turn, MAX_PWM), -MAX_PWM),  # BR
+    ]
+    return duties, duty_turn != 0
+
+def main():
+    move_lut = build_axis_lut(DEAD_ZONE, MAX_PWM)
+    turn_lut = build_axis_lut(DEAD_ZONE, MAX_PWM)
+
+    # 量子化の誤差として、各軸ごとにテーブル1段分のずれを許容する（前後・左右・旋回の3軸分）
+    tolerance = 3 * MAX_PWM / AXIS_LUT_SCALE
+    # デッドゾーンの境界付近は除く
+    axis_values = [a for a in np.linspace(-1.0, 1.0, 41)
+                   if abs(abs(a) - DEAD_ZONE) > 1.0 / AXIS_LUT_SCALE]
+
+    failures = 0
+    for lv in axis_values:
+        for lh in axis_values:
+            for rh in axis_values:
+                expected, expected_turning = reference_mix(lv, lh, rh)
+                result = mix(lv, lh, rh, move_lut, turn_lut, TURN_SPEED_FACTOR, MAX_PWM)
+                if (any(abs(actual - want) > tolerance for actual, want in zip(result[:4], expected))
+                        or result[4] != expected_turning):
+                    print(f"Mismatch for axes {(lv, lh, rh)}: {result} != {expected}, {expected_turning}")
+                    failures += 1
+
+    # 前進と後退で同じ速度になることを確認
+    forward = mix(-0.5, 0.0, 0.0, move_lut, turn_lut, TURN_SPEED_FACTOR, MAX_PWM)[0]
+    backward = mix(0.5, 0.0, 0.0, move_lut, turn_lut, TURN_SPEED_FACTOR, MAX_PWM)[0]
+    if forward != -backward:
+        print(f"Forward and backward speeds differ: {forward} != {-backward}")
+        failures += 1
+
+    if failures:
+        print(f"{failures} check(s) failed.")
+        sys.exit(1)
+    print("mix matches the reference formula.")
+
+if __name__ == "__main__":
+    main()